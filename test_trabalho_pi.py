@@ -0,0 +1,182 @@
+import os
+
+import numpy as np
+import pytest
+
+import trabalho_pi
+
+
+@pytest.fixture
+def imagem_aleatoria():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(173, 462, 3), dtype=np.uint8)
+
+
+def referencia_cinza(imagem_rgb):
+    rgb = imagem_rgb.astype(np.int64)
+    return ((77 * rgb[:, :, 0] + 150 * rgb[:, :, 1] + 29 * rgb[:, :, 2] + 128) >> 8).astype(np.uint8)
+
+
+def test_rgb_para_cinza_usa_formula_ponto_fixo(imagem_aleatoria):
+    np.testing.assert_array_equal(trabalho_pi.rgb_para_cinza(imagem_aleatoria),
+                                  referencia_cinza(imagem_aleatoria))
+
+
+@pytest.mark.parametrize('numba', [False, True])
+def test_cinza_e_histograma_igual_em_todos_os_backends(monkeypatch, imagem_aleatoria, numba):
+    if numba and not trabalho_pi.NUMBA_DISPONIVEL:
+        pytest.skip('numba não instalado')
+    monkeypatch.setattr(trabalho_pi, 'NUMBA_DISPONIVEL', numba)
+    
+    matriz_cinza, histograma = trabalho_pi.cinza_e_histograma(imagem_aleatoria)
+    
+    esperado = referencia_cinza(imagem_aleatoria)
+    np.testing.assert_array_equal(matriz_cinza, esperado)
+    np.testing.assert_array_equal(histograma, np.bincount(esperado.ravel(), minlength=256))
+
+
+def test_rgb_para_cinza_aceita_float(imagem_aleatoria):
+    cinza = trabalho_pi.rgb_para_cinza(imagem_aleatoria.astype(np.float64))
+    np.testing.assert_array_equal(cinza, referencia_cinza(imagem_aleatoria))
+
+
+@pytest.mark.parametrize('numba', [False, True])
+@pytest.mark.parametrize('limiar', [-5, 0, 127, 254, 255])
+@pytest.mark.parametrize('dtype', [np.uint8, np.float64])
+def test_binarizar_imagem_igual_a_np_where(monkeypatch, numba, limiar, dtype):
+    if numba and not trabalho_pi.NUMBA_DISPONIVEL:
+        pytest.skip('numba não instalado')
+    monkeypatch.setattr(trabalho_pi, 'NUMBA_DISPONIVEL', numba)
+    matriz_cinza = np.arange(256).reshape(16, 16).astype(dtype)
+    
+    matriz_binaria = trabalho_pi.binarizar_imagem(matriz_cinza, limiar)
+    
+    esperado = np.where(matriz_cinza > limiar, 255, 0).astype(np.uint8)
+    np.testing.assert_array_equal(matriz_binaria, esperado)
+
+
+def test_processar_lote_gera_um_arquivo_por_imagem(tmp_path):
+    from PIL import Image
+    
+    rng = np.random.default_rng(1)
+    # Roda um kernel paralelo antes do lote: com fork, o processo travava na saída
+    trabalho_pi.cinza_e_histograma(rng.integers(0, 256, size=(20, 30, 3), dtype=np.uint8))
+    
+    for nome in ('a.png', 'a.jpg', 'b.png'):
+        Image.fromarray(rng.integers(0, 256, size=(20, 30, 3), dtype=np.uint8)).save(tmp_path / nome)
+    
+    resultados = trabalho_pi.processar_lote(str(tmp_path), workers=2)
+    saidas = sorted(os.path.basename(caminho) for caminho, _ in resultados)
+    assert saidas == ['a_jpg_binarizada.png', 'a_png_binarizada.png', 'b_png_binarizada.png']
+    
+    # Uma segunda execução não reprocessa os resultados da primeira
+    assert len(trabalho_pi.processar_lote(str(tmp_path), workers=2)) == 3
+    
+    # Um único arquivo também é aceito
+    caminho_unico = str(tmp_path / 'b.png')
+    assert len(trabalho_pi.processar_lote(caminho_unico, workers=1)) == 1
+
+
+def test_processar_lote_gpu_sem_cupy_usa_cpu(monkeypatch):
+    monkeypatch.setattr(trabalho_pi, 'CUPY_DISPONIVEL', False)
+    rng = np.random.default_rng(2)
+    imagens = [rng.integers(0, 256, size=forma, dtype=np.uint8)
+               for forma in ((12, 18, 3), (12, 18, 3), (7, 5, 3))]
+    
+    resultados = trabalho_pi.processar_lote_gpu(imagens)
+    
+    assert len(resultados) == len(imagens)
+    for imagem_rgb, (matriz_cinza, histograma, matriz_binaria, limiar) in zip(imagens, resultados):
+        esperado = referencia_cinza(imagem_rgb)
+        np.testing.assert_array_equal(matriz_cinza, esperado)
+        np.testing.assert_array_equal(histograma, np.bincount(esperado.ravel(), minlength=256))
+        assert limiar == trabalho_pi.calcular_limiar_otsu(histograma)
+        np.testing.assert_array_equal(matriz_binaria, np.where(esperado > limiar, 255, 0))
+
+
+def referencia_limiar_otsu(histograma):
+    """Laço original do trabalho, usado como referência"""
+    total_pixels = np.sum(histograma)
+    soma_total = sum(i * histograma[i] for i in range(256))
+    soma_fundo = peso_fundo = variancia_maxima = limiar_otimo = 0
+    for limiar in range(256):
+        peso_fundo += histograma[limiar]
+        if peso_fundo == 0:
+            continue
+        peso_objeto = total_pixels - peso_fundo
+        if peso_objeto == 0:
+            break
+        soma_fundo += limiar * histograma[limiar]
+        media_fundo = soma_fundo / peso_fundo
+        media_objeto = (soma_total - soma_fundo) / peso_objeto
+        variancia_entre = peso_fundo * peso_objeto * (media_fundo - media_objeto) ** 2
+        if variancia_entre > variancia_maxima:
+            variancia_maxima = variancia_entre
+            limiar_otimo = limiar
+    return limiar_otimo
+
+
+def histogramas_otsu():
+    rng = np.random.default_rng(3)
+    vazio = np.zeros(256, dtype=int)
+    um_valor = np.zeros(256, dtype=int)
+    um_valor[90] = 500
+    dois_valores = np.zeros(256, dtype=int)
+    dois_valores[[40, 200]] = [300, 700]
+    extremos = np.zeros(256, dtype=int)
+    extremos[[0, 255]] = [1, 1]
+    gaussianas = np.bincount(np.clip(np.concatenate([rng.normal(70, 15, 4000),
+                                                     rng.normal(180, 25, 6000)]), 0, 255).astype(int),
+                             minlength=256)
+    return {
+        'vazio': vazio,
+        'um_valor': um_valor,
+        'dois_valores': dois_valores,
+        'extremos': extremos,
+        'gaussianas': gaussianas,
+        'aleatorio': rng.integers(0, 1000, size=256),
+    }
+
+
+@pytest.mark.parametrize('numba', [False, True])
+@pytest.mark.parametrize('nome', list(histogramas_otsu()))
+def test_limiar_otsu_igual_ao_laco(monkeypatch, nome, numba):
+    if numba and not trabalho_pi.NUMBA_DISPONIVEL:
+        pytest.skip('numba não instalado')
+    monkeypatch.setattr(trabalho_pi, 'NUMBA_DISPONIVEL', numba)
+    histograma = histogramas_otsu()[nome]
+    
+    assert trabalho_pi.calcular_limiar_otsu(histograma) == referencia_limiar_otsu(histograma)
+
+
+def test_visualizar_resultados_reaproveita_figura(monkeypatch, tmp_path):
+    import matplotlib.pyplot as plt
+    
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(4)
+    
+    def visualizar(forma):
+        imagem_rgb = rng.integers(0, 256, size=forma + (3,), dtype=np.uint8)
+        matriz_cinza, histograma = trabalho_pi.cinza_e_histograma(imagem_rgb)
+        limiar = trabalho_pi.calcular_limiar_otsu(histograma)
+        matriz_binaria = trabalho_pi.binarizar_imagem(matriz_cinza, limiar)
+        trabalho_pi.visualizar_resultados(imagem_rgb, matriz_cinza, histograma, matriz_binaria,
+                                          limiar, mostrar=False)
+        return trabalho_pi._cache_figura['fig'], matriz_cinza
+    
+    primeira, _ = visualizar((10, 12))
+    mesma, matriz_cinza = visualizar((10, 12))
+    assert mesma is primeira
+    np.testing.assert_array_equal(trabalho_pi._cache_figura['cinza'][0].get_array(), matriz_cinza)
+    
+    nova, _ = visualizar((8, 6))
+    assert nova is not primeira
+    assert not plt.fignum_exists(primeira.number)
+    
+    # Figura fechada pelo usuário (janela fechada): precisa ser recriada
+    plt.close(nova)
+    recriada, _ = visualizar((8, 6))
+    assert recriada is not nova
+    assert plt.fignum_exists(recriada.number)
+    assert (tmp_path / 'resultado_completo.png').exists()
+    plt.close(recriada)
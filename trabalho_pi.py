@@ -1,7 +1,44 @@
 import numpy as np
 from PIL import Image, ImageDraw
-import matplotlib.pyplot as plt
+import matplotlib
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Sem TRABALHO_MOSTRAR=1 a figura só é salva em arquivo: o backend Agg não
+# abre janela e evita inicializar a interface gráfica em execuções em lote
+MOSTRAR_FIGURA = os.environ.get('TRABALHO_MOSTRAR', '0') == '1'
+# Estatísticas de diagnóstico (mínimo, máximo, contagens) exigem passagens
+# extras pela imagem; só são calculadas com TRABALHO_VERBOSE=1
+VERBOSE = os.environ.get('TRABALHO_VERBOSE', '0') == '1'
+
+if not MOSTRAR_FIGURA:
+    matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+try:
+    from numba import njit, prange, get_num_threads, set_num_threads
+    NUMBA_DISPONIVEL = True
+except ImportError:
+    NUMBA_DISPONIVEL = False
+
+try:
+    from fast_histogram import histogram1d
+    FAST_HISTOGRAM_DISPONIVEL = True
+except ImportError:
+    FAST_HISTOGRAM_DISPONIVEL = False
+
+try:
+    import cv2
+    OPENCV_DISPONIVEL = True
+except ImportError:
+    OPENCV_DISPONIVEL = False
+
+try:
+    import cupy as cp
+    CUPY_DISPONIVEL = True
+except ImportError:
+    CUPY_DISPONIVEL = False
 
 # =============================================================================
 # PARTE 1: FUNÇÕES OBRIGATÓRIAS DO TRABALHO
@@ -31,26 +68,75 @@ def carregar_imagem(caminho_imagem):
     return imagem_array
 
 
-def rgb_para_cinza(imagem_rgb):
+def _para_uint8(imagem):
+    """Converte entradas que não são uint8 (ex.: float) para a faixa 0-255 em uint8"""
+    if imagem.dtype == np.uint8:
+        return imagem
+    return np.clip(imagem, 0, 255).astype(np.uint8)
+
+
+def _cinza_ponto_fixo(imagem_rgb, saida=None):
+    """
+    Conversão RGB -> cinza em inteiros, sem mensagens (usada também por faixas).
+    Não usa cv2.cvtColor: o arredondamento do OpenCV é outro, e o resultado
+    precisa ser idêntico ao do kernel Numba.
+    """
+    imagem_rgb = _para_uint8(imagem_rgb)
+    if saida is None:
+        saida = np.empty(imagem_rgb.shape[:2], dtype=np.uint8)
+    
+    # Aritmética de ponto fixo (pesos * 256): 77 + 150 + 29 = 256, então o
+    # resultado nunca passa de 255 e não é preciso usar ponto flutuante.
+    # Operações in-place em dois buffers uint16, sem cópia dos três canais
+    acumulador = np.multiply(imagem_rgb[:, :, 0], 77, dtype=np.uint16)
+    termo = np.multiply(imagem_rgb[:, :, 1], 150, dtype=np.uint16)
+    acumulador += termo
+    np.multiply(imagem_rgb[:, :, 2], 29, out=termo, dtype=np.uint16)
+    acumulador += termo
+    acumulador += 128
+    acumulador >>= 8
+    np.copyto(saida, acumulador, casting='unsafe')
+    return saida
+
+
+# Limite de threads por processo; definido nos processos de processar_lote
+_limite_threads = None
+
+
+def _processar_em_faixas(altura, funcao):
+    """
+    Divide as linhas da imagem em faixas e executa funcao(inicio, fim) em
+    paralelo, uma faixa por núcleo. As operações do NumPy liberam o GIL,
+    então threads são suficientes.
+    """
+    n_faixas = max(1, min(_limite_threads or os.cpu_count() or 1, altura))
+    limites = [k * altura // n_faixas for k in range(n_faixas + 1)]
+    
+    if n_faixas == 1:
+        return [funcao(0, altura)]
+    
+    with ThreadPoolExecutor(max_workers=n_faixas) as executor:
+        return list(executor.map(funcao, limites[:-1], limites[1:]))
+
+
+def rgb_para_cinza(imagem_rgb, saida=None):
     """
     Transforma uma imagem RGB em uma matriz de tons de cinza.
     Usa a fórmula padrão: Gray = 0.299*R + 0.587*G + 0.114*B
+    (aproximada em inteiros: (77*R + 150*G + 29*B + 128) >> 8)
     
     Args:
         imagem_rgb: Array numpy com imagem RGB (altura, largura, 3)
+        saida: Matriz uint8 (altura, largura) opcional para reaproveitar memória
         
     Returns:
         Matriz de tons de cinza (altura, largura) com valores de 0 a 255
     """
-    r = imagem_rgb[:, :, 0]
-    g = imagem_rgb[:, :, 1]
-    b = imagem_rgb[:, :, 2]
-    
-    cinza = 0.299 * r + 0.587 * g + 0.114 * b
-    cinza = np.clip(cinza, 0, 255).astype(np.uint8)
+    cinza = _cinza_ponto_fixo(imagem_rgb, saida)
     
     print(f"✓ Conversão para tons de cinza concluída")
-    print(f"  Valores: mínimo={cinza.min()}, máximo={cinza.max()}")
+    if VERBOSE:
+        print(f"  Valores: mínimo={cinza.min()}, máximo={cinza.max()}")
     
     return cinza
 
@@ -65,86 +151,230 @@ def calcular_histograma(matriz_cinza):
     Returns:
         Array com 256 posições contendo a frequência de cada tom de cinza
     """
-    histograma = np.zeros(256, dtype=int)
-    
-    for valor in range(256):
-        histograma[valor] = np.sum(matriz_cinza == valor)
+    if matriz_cinza.dtype == np.uint8:
+        # Uma única passagem sobre a imagem, em vez de 256 comparações completas
+        histograma = np.bincount(matriz_cinza.ravel(), minlength=256).astype(int)
+    elif FAST_HISTOGRAM_DISPONIVEL:
+        # Outros tipos (ex.: float): caixas uniformes, sem busca de bordas
+        histograma = histogram1d(matriz_cinza.ravel(), bins=256, range=(0, 256)).astype(int)
+    else:
+        histograma = np.histogram(matriz_cinza, bins=256, range=(0, 256))[0].astype(int)
     
     print(f"✓ Histograma calculado")
-    print(f"  Total de pixels: {np.sum(histograma)}")
+    if VERBOSE:
+        print(f"  Total de pixels: {np.sum(histograma)}")
     
     return histograma
 
 
-def calcular_limiar_otsu(histograma):
+if NUMBA_DISPONIVEL:
+    @njit(parallel=True, cache=True)
+    def _cinza_e_histograma_numba(imagem_rgb, cinza_saida, histograma_saida, n_blocos):
+        """Converte para cinza e acumula o histograma na mesma passagem pela imagem"""
+        altura, largura = cinza_saida.shape
+        # Um histograma privado por bloco de linhas evita conflitos entre threads;
+        # dentro do bloco, 4 cópias alternadas por coluna evitam que pixels
+        # vizinhos iguais (regiões uniformes) incrementem sempre a mesma posição
+        histogramas_blocos = np.zeros((n_blocos, 4, 256), dtype=np.int64)
+        
+        for bloco in prange(n_blocos):
+            inicio = bloco * altura // n_blocos
+            fim = (bloco + 1) * altura // n_blocos
+            for i in range(inicio, fim):
+                for j in range(largura):
+                    valor = (77 * np.uint16(imagem_rgb[i, j, 0])
+                             + 150 * np.uint16(imagem_rgb[i, j, 1])
+                             + 29 * np.uint16(imagem_rgb[i, j, 2]) + 128) >> 8
+                    cinza_saida[i, j] = valor
+                    histogramas_blocos[bloco, j & 3, valor] += 1
+        
+        for bloco in range(n_blocos):
+            for copia in range(4):
+                for valor in range(256):
+                    histograma_saida[valor] += histogramas_blocos[bloco, copia, valor]
+
+
+def cinza_e_histograma(imagem_rgb):
     """
-    Escolhe automaticamente um limiar usando o método de Otsu.
-    Este método encontra o limiar que maximiza a variância entre classes.
+    Executa a conversão para tons de cinza e o cálculo do histograma.
+    Os dois passos são fundidos em uma única passagem e as linhas da imagem
+    são divididas entre os núcleos (com Numba ou, sem ele, com threads).
     
     Args:
-        histograma: Array com frequências de cada intensidade (0-255)
+        imagem_rgb: Array numpy com imagem RGB (altura, largura, 3)
         
     Returns:
-        Valor do limiar ótimo (0-255)
+        Tupla (matriz de tons de cinza, histograma com 256 posições)
     """
-    total_pixels = np.sum(histograma)
+    imagem_rgb = _para_uint8(imagem_rgb)
+    altura, largura = imagem_rgb.shape[:2]
+    matriz_cinza = np.empty((altura, largura), dtype=np.uint8)
+    
+    if NUMBA_DISPONIVEL:
+        histograma = np.zeros(256, dtype=np.int64)
+        # O número de blocos vem de fora: ler get_num_threads() dentro do
+        # kernel impediria o cache em disco da compilação
+        _cinza_e_histograma_numba(imagem_rgb, matriz_cinza, histograma, get_num_threads())
+    else:
+        # Cada faixa escreve sua parte da matriz e devolve um histograma
+        # privado; os parciais são somados no final
+        def processar_faixa(inicio, fim):
+            _cinza_ponto_fixo(imagem_rgb[inicio:fim], saida=matriz_cinza[inicio:fim])
+            return np.bincount(matriz_cinza[inicio:fim].ravel(), minlength=256)
+        
+        histograma = np.sum(_processar_em_faixas(altura, processar_faixa), axis=0)
     
-    soma_total = 0
-    for i in range(256):
-        soma_total += i * histograma[i]
+    histograma = histograma.astype(int)
     
-    soma_fundo = 0
-    peso_fundo = 0
-    variancia_maxima = 0
-    limiar_otimo = 0
+    print(f"✓ Conversão para tons de cinza e histograma concluídos")
+    if VERBOSE:
+        print(f"  Valores: mínimo={matriz_cinza.min()}, máximo={matriz_cinza.max()}")
+        print(f"  Total de pixels: {np.sum(histograma)}")
     
-    for limiar in range(256):
-        peso_fundo += histograma[limiar]
-        
-        if peso_fundo == 0:
-            continue
-            
-        peso_objeto = total_pixels - peso_fundo
+    return matriz_cinza, histograma
+
+
+if NUMBA_DISPONIVEL:
+    @njit(cache=True)
+    def _limiar_otsu_numba(histograma):
+        """Busca do limiar de Otsu em um único laço compilado, sem arrays temporários"""
+        total_pixels = 0.0
+        soma_total = 0.0
+        for i in range(256):
+            total_pixels += histograma[i]
+            soma_total += i * histograma[i]
         
-        if peso_objeto == 0:
-            break
+        soma_fundo = 0.0
+        peso_fundo = 0.0
+        variancia_maxima = 0.0
+        limiar_otimo = 0
         
-        soma_fundo += limiar * histograma[limiar]
+        for limiar in range(256):
+            peso_fundo += histograma[limiar]
+            if peso_fundo == 0:
+                continue
+            
+            peso_objeto = total_pixels - peso_fundo
+            if peso_objeto == 0:
+                break
+            
+            soma_fundo += limiar * histograma[limiar]
+            media_fundo = soma_fundo / peso_fundo
+            media_objeto = (soma_total - soma_fundo) / peso_objeto
+            variancia_entre = peso_fundo * peso_objeto * (media_fundo - media_objeto) ** 2
+            
+            if variancia_entre > variancia_maxima:
+                variancia_maxima = variancia_entre
+                limiar_otimo = limiar
         
+        return limiar_otimo
+
+
+def _limiar_otsu_vetorizado(histograma, xp=np):
+    """
+    Busca do limiar de Otsu com somas acumuladas. xp é o módulo de arrays
+    (numpy ou cupy), para que a mesma conta rode também na GPU.
+    """
+    intensidades = xp.arange(256)
+    
+    # Pesos e somas acumuladas do fundo para todos os limiares de uma vez
+    peso_fundo = xp.cumsum(histograma).astype(xp.float64)
+    soma_fundo = xp.cumsum(intensidades * histograma).astype(xp.float64)
+    total_pixels = peso_fundo[-1]
+    soma_total = soma_fundo[-1]
+    peso_objeto = total_pixels - peso_fundo
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
         media_fundo = soma_fundo / peso_fundo
         media_objeto = (soma_total - soma_fundo) / peso_objeto
-        
         variancia_entre = peso_fundo * peso_objeto * (media_fundo - media_objeto) ** 2
+    
+    # Limiares com uma das classes vazia não são candidatos
+    variancia_entre[~xp.isfinite(variancia_entre)] = 0
+    return xp.argmax(variancia_entre)
+
+
+def calcular_limiar_otsu(histograma):
+    """
+    Escolhe automaticamente um limiar usando o método de Otsu.
+    Este método encontra o limiar que maximiza a variância entre classes.
+    
+    Args:
+        histograma: Array com frequências de cada intensidade (0-255)
         
-        if variancia_entre > variancia_maxima:
-            variancia_maxima = variancia_entre
-            limiar_otimo = limiar
+    Returns:
+        Valor do limiar ótimo (0-255)
+    """
+    if NUMBA_DISPONIVEL:
+        limiar_otimo = int(_limiar_otsu_numba(np.ascontiguousarray(histograma, dtype=np.int64)))
+    else:
+        limiar_otimo = int(_limiar_otsu_vetorizado(histograma))
     
     print(f"✓ Limiar calculado pelo método de Otsu: {limiar_otimo}")
     
     return limiar_otimo
 
 
-def binarizar_imagem(matriz_cinza, limiar):
+if NUMBA_DISPONIVEL:
+    @njit(parallel=True, cache=True)
+    def _binarizar_numba(matriz_cinza, limiar, binaria_saida):
+        """Aplica o limiar e conta os pixels brancos na mesma passagem"""
+        altura, largura = matriz_cinza.shape
+        pixels_brancos = 0
+        for i in prange(altura):
+            for j in range(largura):
+                if matriz_cinza[i, j] > limiar:
+                    binaria_saida[i, j] = 255
+                    pixels_brancos += 1
+                else:
+                    binaria_saida[i, j] = 0
+        return pixels_brancos
+
+
+def binarizar_imagem(matriz_cinza, limiar, verbose=None):
     """
     Transforma a matriz de tons de cinza em uma matriz binária.
     
     Args:
         matriz_cinza: Matriz de tons de cinza
         limiar: Valor do limiar para binarização
+        verbose: Se False, não conta os pixels nem imprime as estatísticas
+            (None usa o valor de VERBOSE)
         
     Returns:
         Matriz binária (apenas valores 0 e 255)
     """
-    matriz_binaria = np.where(matriz_cinza > limiar, 255, 0).astype(np.uint8)
-    
-    pixels_brancos = np.sum(matriz_binaria == 255)
-    pixels_pretos = np.sum(matriz_binaria == 0)
-    total = matriz_binaria.size
+    if verbose is None:
+        verbose = VERBOSE
+    
+    if NUMBA_DISPONIVEL:
+        matriz_binaria = np.empty(matriz_cinza.shape, dtype=np.uint8)
+        pixels_brancos = int(_binarizar_numba(matriz_cinza, limiar, matriz_binaria))
+    elif matriz_cinza.dtype == np.uint8:
+        # Tabela de consulta de 256 posições: gera uint8 diretamente, sem int64 temporário
+        tabela = np.where(np.arange(256) > limiar, 255, 0).astype(np.uint8)
+        matriz_binaria = np.empty(matriz_cinza.shape, dtype=np.uint8)
+        
+        def processar_faixa(inicio, fim):
+            # mode='clip' evita o buffer de saída; índices uint8 já estão em 0-255
+            np.take(tabela, matriz_cinza[inicio:fim], out=matriz_binaria[inicio:fim], mode='clip')
+            if verbose:
+                return int(np.count_nonzero(matriz_binaria[inicio:fim]))
+            return 0
+        
+        pixels_brancos = sum(_processar_em_faixas(matriz_cinza.shape[0], processar_faixa))
+    else:
+        # Outros tipos (ex.: float) não servem de índice para a tabela
+        matriz_binaria = np.where(matriz_cinza > limiar, 255, 0).astype(np.uint8)
+        pixels_brancos = int(np.count_nonzero(matriz_binaria)) if verbose else 0
     
     print(f"✓ Binarização concluída")
-    print(f"  Pixels brancos: {pixels_brancos} ({pixels_brancos/total*100:.1f}%)")
-    print(f"  Pixels pretos: {pixels_pretos} ({pixels_pretos/total*100:.1f}%)")
+    if verbose:
+        # Uma única contagem basta: pretos = total - brancos
+        total = matriz_binaria.size
+        pixels_pretos = total - pixels_brancos
+        print(f"  Pixels brancos: {pixels_brancos} ({pixels_brancos/total*100:.1f}%)")
+        print(f"  Pixels pretos: {pixels_pretos} ({pixels_pretos/total*100:.1f}%)")
     
     return matriz_binaria
 
@@ -157,7 +387,10 @@ def salvar_imagem(matriz, caminho_saida):
         matriz: Matriz de pixels
         caminho_saida: Caminho onde a imagem será salva
     """
-    imagem = Image.fromarray(matriz.astype(np.uint8))
+    # As matrizes do pipeline já são uint8: converter só quando necessário evita uma cópia
+    if matriz.dtype != np.uint8:
+        matriz = matriz.astype(np.uint8)
+    imagem = Image.fromarray(matriz)
     imagem.save(caminho_saida)
     print(f"✓ Imagem salva em: {caminho_saida}")
 
@@ -185,53 +418,117 @@ def criar_imagem_teste():
 # PARTE 3: VISUALIZAÇÃO DOS RESULTADOS
 # =============================================================================
 
-def visualizar_resultados(imagem_original, matriz_cinza, histograma, matriz_binaria, limiar):
-    """Visualiza todos os passos do processamento"""
+# Figura reaproveitada entre chamadas com imagens do mesmo tamanho
+_cache_figura = {}
+
+
+def _criar_figura(imagem_original, matriz_cinza, histograma, matriz_binaria, limiar):
+    """Monta a figura 2x3 e guarda os elementos que mudam a cada chamada"""
     fig, axes = plt.subplots(2, 3, figsize=(15, 10))
     
-    axes[0, 0].imshow(imagem_original)
+    img_original = axes[0, 0].imshow(imagem_original)
     axes[0, 0].set_title('1. Imagem Original (RGB)', fontsize=12, fontweight='bold')
     axes[0, 0].axis('off')
     
-    axes[0, 1].imshow(matriz_cinza, cmap='gray')
+    img_cinza = axes[0, 1].imshow(matriz_cinza, cmap='gray')
     axes[0, 1].set_title('2. Tons de Cinza', fontsize=12, fontweight='bold')
     axes[0, 1].axis('off')
     
-    axes[0, 2].bar(range(256), histograma, color='gray', width=1)
-    axes[0, 2].axvline(x=limiar, color='red', linestyle='--', linewidth=2, 
-                       label=f'Limiar = {limiar}')
+    # Um único StepPatch em vez de 256 retângulos: bem mais leve de renderizar
+    degraus = axes[0, 2].stairs(histograma, np.arange(257) - 0.5, fill=True, color='gray')
+    linha_limiar = axes[0, 2].axvline(x=limiar, color='red', linestyle='--', linewidth=2, 
+                                      label=f'Limiar = {limiar}')
     axes[0, 2].set_title('3. Histograma', fontsize=12, fontweight='bold')
     axes[0, 2].set_xlabel('Intensidade')
     axes[0, 2].set_ylabel('Frequência')
     axes[0, 2].legend()
     axes[0, 2].grid(True, alpha=0.3)
     
-    axes[1, 0].imshow(matriz_binaria, cmap='gray')
+    img_binaria = axes[1, 0].imshow(matriz_binaria, cmap='gray')
     axes[1, 0].set_title(f'4. Imagem Binarizada (Limiar={limiar})', 
                          fontsize=12, fontweight='bold')
     axes[1, 0].axis('off')
     
-    axes[1, 1].imshow(matriz_cinza, cmap='gray')
+    img_antes = axes[1, 1].imshow(matriz_cinza, cmap='gray')
     axes[1, 1].set_title('Antes da Binarização', fontsize=12)
     axes[1, 1].axis('off')
     
-    axes[1, 2].imshow(matriz_binaria, cmap='gray')
+    img_depois = axes[1, 2].imshow(matriz_binaria, cmap='gray')
     axes[1, 2].set_title('Depois da Binarização', fontsize=12)
     axes[1, 2].axis('off')
     
     plt.tight_layout()
-    plt.savefig('resultado_completo.png', dpi=150, bbox_inches='tight')
+    
+    _cache_figura.clear()
+    _cache_figura.update({
+        'forma': imagem_original.shape,
+        'fig': fig,
+        'axes': axes,
+        'original': img_original,
+        'cinza': [img_cinza, img_antes],
+        'binaria': [img_binaria, img_depois],
+        'degraus': degraus,
+        'linha_limiar': linha_limiar,
+    })
+
+
+def _atualizar_figura(imagem_original, matriz_cinza, histograma, matriz_binaria, limiar):
+    """Troca apenas os dados da figura em cache, sem recriar os eixos"""
+    axes = _cache_figura['axes']
+    
+    _cache_figura['original'].set_data(imagem_original)
+    for img in _cache_figura['cinza']:
+        img.set_data(matriz_cinza)
+        img.autoscale()
+    for img in _cache_figura['binaria']:
+        img.set_data(matriz_binaria)
+        img.autoscale()
+    
+    _cache_figura['degraus'].set_data(histograma)
+    axes[0, 2].relim()
+    axes[0, 2].autoscale_view()
+    
+    _cache_figura['linha_limiar'].set_xdata([limiar, limiar])
+    _cache_figura['linha_limiar'].set_label(f'Limiar = {limiar}')
+    axes[0, 2].legend()
+    axes[1, 0].set_title(f'4. Imagem Binarizada (Limiar={limiar})', 
+                         fontsize=12, fontweight='bold')
+
+
+def visualizar_resultados(imagem_original, matriz_cinza, histograma, matriz_binaria, limiar,
+                          mostrar=MOSTRAR_FIGURA):
+    """
+    Visualiza todos os passos do processamento.
+    A janela só é aberta com mostrar=True; a figura é sempre salva em arquivo.
+    """
+    # A figura só é reaproveitada se ainda existir no pyplot (fechar a janela a descarta)
+    if (_cache_figura.get('forma') == imagem_original.shape
+            and plt.fignum_exists(_cache_figura['fig'].number)):
+        _atualizar_figura(imagem_original, matriz_cinza, histograma, matriz_binaria, limiar)
+    else:
+        if _cache_figura:
+            plt.close(_cache_figura['fig'])
+        _criar_figura(imagem_original, matriz_cinza, histograma, matriz_binaria, limiar)
+    
+    fig = _cache_figura['fig']
+    fig.savefig('resultado_completo.png', dpi=150, bbox_inches='tight')
     print("✓ Visualização salva em: resultado_completo.png")
-    plt.show()
+    if mostrar:
+        plt.show()
 
 
 # =============================================================================
 # PARTE 4: FUNÇÃO PRINCIPAL
 # =============================================================================
 
-def processar_imagem_completo(caminho_entrada, caminho_saida='imagem_binarizada.png'):
+def processar_imagem_completo(caminho_entrada, caminho_saida='imagem_binarizada.png',
+                              visualizar=True):
     """
     Função principal que executa todos os passos do processamento.
+    
+    Os passos 2 e 3 são feitos juntos por cinza_e_histograma (uma passagem
+    pela imagem). Com OpenCV disponível, os passos 4 e 5 são feitos por
+    cv2.threshold com THRESH_OTSU.
     """
     print("\n" + "="*70)
     print("PROCESSAMENTO DE LIMIARIZAÇÃO POR EQUILÍBRIO DO HISTOGRAMA")
@@ -241,35 +538,227 @@ def processar_imagem_completo(caminho_entrada, caminho_saida='imagem_binarizada.
     print("[PASSO 1] Carregando imagem RGB...")
     imagem_original = carregar_imagem(caminho_entrada)
     
-    print("\n[PASSO 2] Convertendo para tons de cinza...")
-    matriz_cinza = rgb_para_cinza(imagem_original)
-    
-    print("\n[PASSO 3] Calculando histograma...")
-    histograma = calcular_histograma(matriz_cinza)
-    
-    print("\n[PASSO 4] Calculando limiar automático (Otsu)...")
-    limiar = calcular_limiar_otsu(histograma)
-    
-    print("\n[PASSO 5] Binarizando imagem...")
-    matriz_binaria = binarizar_imagem(matriz_cinza, limiar)
+    print("\n[PASSO 2-3] Convertendo para tons de cinza e calculando histograma...")
+    matriz_cinza, histograma = cinza_e_histograma(imagem_original)
+    
+    if OPENCV_DISPONIVEL:
+        print("\n[PASSOS 4-5] Limiar de Otsu e binarização (OpenCV)...")
+        limiar, matriz_binaria = cv2.threshold(matriz_cinza, 0, 255,
+                                               cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        limiar = int(limiar)
+        print(f"✓ Limiar calculado pelo método de Otsu: {limiar}")
+    else:
+        print("\n[PASSO 4] Calculando limiar automático (Otsu)...")
+        limiar = calcular_limiar_otsu(histograma)
+        
+        print("\n[PASSO 5] Binarizando imagem...")
+        matriz_binaria = binarizar_imagem(matriz_cinza, limiar)
     
     print("\n[PASSO 6] Salvando resultado...")
     salvar_imagem(matriz_binaria, caminho_saida)
     
-    print("\n[BÔNUS] Criando visualização completa...")
-    visualizar_resultados(imagem_original, matriz_cinza, histograma, matriz_binaria, limiar)
+    if visualizar:
+        print("\n[BÔNUS] Criando visualização completa...")
+        visualizar_resultados(imagem_original, matriz_cinza, histograma, matriz_binaria, limiar)
     
     print("\n" + "="*70)
     print("PROCESSAMENTO CONCLUÍDO COM SUCESSO!")
     print("="*70)
     print("\nArquivos gerados:")
     print(f"  • {caminho_saida} - Imagem binarizada")
-    print(f"  • resultado_completo.png - Visualização de todos os passos")
+    if visualizar:
+        print(f"  • resultado_completo.png - Visualização de todos os passos")
     print("\n")
     
     return imagem_original, matriz_cinza, histograma, matriz_binaria, limiar
 
 
+# =============================================================================
+# PARTE 5: PROCESSAMENTO EM LOTE
+# =============================================================================
+
+def _array_fixado(forma, dtype):
+    """Array numpy em memória fixada (pinned), necessária para cópias assíncronas"""
+    n_itens = int(np.prod(forma))
+    memoria = cp.cuda.alloc_pinned_memory(n_itens * np.dtype(dtype).itemsize)
+    return np.frombuffer(memoria, dtype, n_itens).reshape(forma)
+
+
+def _preparar_posicao_gpu(posicao, forma):
+    """(Re)aloca os buffers fixados de uma posição quando o tamanho da imagem muda"""
+    if posicao.get('forma') == forma:
+        return
+    altura, largura = forma[:2]
+    posicao.update({
+        'forma': forma,
+        'rgb': _array_fixado(forma, np.uint8),
+        'cinza': _array_fixado((altura, largura), np.uint8),
+        'binaria': _array_fixado((altura, largura), np.uint8),
+        'histograma': _array_fixado((256,), np.int64),
+        'limiar': _array_fixado((1,), np.int64),
+    })
+
+
+def _drenar_posicao_gpu(posicao, resultados):
+    """Espera o stream da posição e copia o resultado pendente para fora dos buffers fixados"""
+    if not posicao.get('pendente'):
+        return
+    posicao['stream'].synchronize()
+    resultados.append((posicao['cinza'].copy(), posicao['histograma'].astype(int),
+                       posicao['binaria'].copy(), int(posicao['limiar'][0])))
+    posicao['pendente'] = False
+
+
+def processar_lote_gpu(imagens_rgb):
+    """
+    Executa cinza, histograma, Otsu e binarização de várias imagens na GPU.
+    As imagens alternam entre dois streams CUDA com buffers de memória
+    fixada, então as cópias de uma imagem (ida e volta) se sobrepõem ao
+    processamento da outra. Antes de reutilizar um stream, o resultado
+    anterior dele é recolhido, e a memória da GPU fica limitada a duas
+    imagens, seja qual for o tamanho do lote.
+    Sem CuPy, o mesmo cálculo é feito na CPU.
+    
+    Args:
+        imagens_rgb: Sequência de arrays numpy RGB (altura, largura, 3)
+        
+    Returns:
+        Lista de tuplas (matriz_cinza, histograma, matriz_binaria, limiar)
+    """
+    if not CUPY_DISPONIVEL:
+        resultados = []
+        for imagem_rgb in imagens_rgb:
+            matriz_cinza, histograma = cinza_e_histograma(imagem_rgb)
+            limiar = calcular_limiar_otsu(histograma)
+            resultados.append((matriz_cinza, histograma,
+                               binarizar_imagem(matriz_cinza, limiar), limiar))
+        return resultados
+    
+    posicoes = [{'stream': cp.cuda.Stream(non_blocking=True)} for _ in range(2)]
+    resultados = []
+    n_imagens = 0
+    
+    for indice, imagem_rgb in enumerate(imagens_rgb):
+        posicao = posicoes[indice % len(posicoes)]
+        # Libera a posição: o resultado anterior sai antes de os buffers serem reutilizados
+        _drenar_posicao_gpu(posicao, resultados)
+        
+        imagem_rgb = _para_uint8(imagem_rgb)
+        _preparar_posicao_gpu(posicao, imagem_rgb.shape)
+        np.copyto(posicao['rgb'], imagem_rgb)
+        
+        stream = posicao['stream']
+        with stream:
+            rgb_gpu = cp.empty(imagem_rgb.shape, dtype=cp.uint8)
+            rgb_gpu.set(posicao['rgb'], stream=stream)
+            rgb16 = rgb_gpu.astype(cp.uint16)
+            cinza = ((77 * rgb16[:, :, 0] + 150 * rgb16[:, :, 1] + 29 * rgb16[:, :, 2]
+                      + 128) >> 8).astype(cp.uint8)
+            histograma = cp.bincount(cinza.ravel(), minlength=256)
+            # O limiar fica na GPU: não há sincronização entre os passos
+            limiar = _limiar_otsu_vetorizado(histograma, xp=cp)
+            binaria = (cinza > limiar).astype(cp.uint8)
+            binaria *= 255
+            
+            # Cópias de volta assíncronas, direto para os buffers fixados
+            # (blocking=False: sem isso, get espera a cópia terminar)
+            cinza.get(stream=stream, out=posicao['cinza'], blocking=False)
+            histograma.get(stream=stream, out=posicao['histograma'], blocking=False)
+            binaria.get(stream=stream, out=posicao['binaria'], blocking=False)
+            limiar.reshape(1).get(stream=stream, out=posicao['limiar'], blocking=False)
+        posicao['pendente'] = True
+        n_imagens += 1
+    
+    # Recolhe as duas últimas imagens, na ordem em que foram enviadas
+    for indice in range(max(0, n_imagens - len(posicoes)), n_imagens):
+        _drenar_posicao_gpu(posicoes[indice % len(posicoes)], resultados)
+    
+    print(f"✓ Lote de {len(resultados)} imagens processado na GPU")
+    
+    return resultados
+
+
+EXTENSOES_IMAGEM = ('.jpg', '.jpeg', '.png', '.tif', '.tiff')
+SUFIXO_LOTE = '_binarizada.png'
+
+
+def _inicializar_processo_lote():
+    """
+    Cada processo do lote já ocupa um núcleo: usa uma única thread para não
+    disputar os núcleos com os outros processos
+    """
+    global _limite_threads
+    _limite_threads = 1
+    if NUMBA_DISPONIVEL:
+        set_num_threads(1)
+    if OPENCV_DISPONIVEL:
+        cv2.setNumThreads(1)
+
+
+def _processar_item_lote(caminhos):
+    """Executado em cada processo do lote; devolve só o limiar para não copiar as matrizes"""
+    caminho_entrada, caminho_saida = caminhos
+    limiar = processar_imagem_completo(caminho_entrada, caminho_saida, visualizar=False)[-1]
+    return caminho_saida, limiar
+
+
+def processar_lote(caminhos, pasta_saida=None, workers=None):
+    """
+    Processa várias imagens em paralelo, uma por processo.
+    
+    Cada processo carrega sua própria cópia do NumPy/Pillow: em máquinas com
+    pouca memória, limite o número de processos com workers.
+    
+    Args:
+        caminhos: Caminho de uma imagem, lista de caminhos ou uma pasta com imagens
+        pasta_saida: Pasta das imagens binarizadas (padrão: subpasta
+            'binarizadas' ao lado de cada imagem de entrada)
+        workers: Número de processos (padrão: núcleos - 1)
+        
+    Returns:
+        Lista de tuplas (caminho da imagem binarizada, limiar), na ordem de entrada
+    """
+    if isinstance(caminhos, str):
+        if os.path.isdir(caminhos):
+            pasta = caminhos
+            # Ignora resultados de execuções anteriores gravados na mesma pasta
+            caminhos = sorted(os.path.join(pasta, nome) for nome in os.listdir(pasta)
+                              if nome.lower().endswith(EXTENSOES_IMAGEM)
+                              and not nome.endswith(SUFIXO_LOTE))
+        else:
+            caminhos = [caminhos]
+    
+    # Cada imagem ganha seu próprio arquivo de saída para os processos não se
+    # sobrescreverem: a extensão entra no nome (a.png e a.jpg) e nomes
+    # repetidos de pastas diferentes recebem um contador
+    tarefas = []
+    usados = set()
+    for caminho in caminhos:
+        pasta = pasta_saida or os.path.join(os.path.dirname(caminho), 'binarizadas')
+        base, extensao = os.path.splitext(os.path.basename(caminho))
+        nome = f"{base}_{extensao.lstrip('.').lower()}"
+        caminho_saida = os.path.join(pasta, nome + SUFIXO_LOTE)
+        contador = 2
+        while caminho_saida in usados:
+            caminho_saida = os.path.join(pasta, f"{nome}_{contador}{SUFIXO_LOTE}")
+            contador += 1
+        usados.add(caminho_saida)
+        os.makedirs(pasta, exist_ok=True)
+        tarefas.append((caminho, caminho_saida))
+    
+    workers = workers or max(1, (os.cpu_count() or 1) - 1)
+    # 'spawn' em vez de fork: depois de um kernel Numba paralelo, o processo
+    # pai trava na saída (TBB) se os processos filhos forem criados com fork
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto,
+                             initializer=_inicializar_processo_lote) as executor:
+        resultados = list(executor.map(_processar_item_lote, tarefas))
+    
+    print(f"✓ Lote concluído: {len(resultados)} imagens processadas com {workers} processos")
+    
+    return resultados
+
+
 # =============================================================================
 # EXECUÇÃO PRINCIPAL
 # =============================================================================
@@ -291,5 +780,3 @@ if __name__ == "__main__":
     print("\nOu execute diretamente:")
     print("  python trabalho_pi.py")
     print("="*70 + "\n")
-
-processar_imagem_completo('teste.jpg', 'resultado.png')
\ No newline at end of file